@@ -1,18 +1,62 @@
+import argparse
 import getpass
+import itertools
 import os
+import threading
+import time
 from datetime import datetime
 
 from langchain.chat_models import init_chat_model
 from langchain_ollama import ChatOllama
 
-model = ChatOllama(model="gemma3", validate_model_on_init=True)
-
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 
+MODEL_NAME = "gemma3"
+# How long Ollama keeps the model loaded after a request, so follow-up questions
+# don't pay for reloading the weights.
+KEEP_ALIVE = "30m"
 
-#this function demonstrates the use of the Message class
-def greetingMessage(name:str):
+# The model is created on first use (see get_model) instead of at import time.
+model = None
+_model_lock = threading.Lock()
+show_ttft = False
+
+def get_model():
+    global model
+    with _model_lock:
+        if model is None:
+            model = ChatOllama(model=MODEL_NAME, keep_alive=KEEP_ALIVE, validate_model_on_init=True)
+    return model
+
+def use_stub_model():
+    """Swap in a local fake chat model that streams a canned answer, no Ollama needed."""
+    global model
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    answer = AIMessage(content="The sky is blue because sunlight bounces off the air and blue light spreads the most. Keep asking questions, you are doing great!")
+    model = GenericFakeChatModel(messages=itertools.repeat(answer))
+
+def warm_up():
+    """Load the model into Ollama in the background while the user is still typing."""
+    try:
+        get_model().invoke([HumanMessage(content="Hi")], options={"num_predict": 1})
+    except Exception as e:
+        print(f"\n(Model warm-up failed: {e})")
+
+def stream_reply(prompt, prefix: str = ""):
+    """Print the model's answer token by token as it is generated."""
+    start = time.perf_counter()
+    first_token = None
+    print(prefix, end="", flush=True)
+    for chunk in get_model().stream(prompt):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        print(chunk.content, end="", flush=True)
+    print()
+    if show_ttft and first_token is not None:
+        print(f"(time to first token: {first_token * 1000:.0f} ms)")
+
+def buildGreeting(name:str) -> list:
     # Get current time and determine appropriate greeting
     current_hour = datetime.now().hour
     if 5 <= current_hour < 12:
@@ -28,13 +72,14 @@ def greetingMessage(name:str):
         SystemMessage(content="You are a kindergarten teacher. Greet your student and ask them what they want to learn today. Propose 2-3 ideas and make your answers within 50 words."),
         HumanMessage(content=time_greeting)
     ]
+    return messages
 
-    response = model.invoke(messages)
-    print(response.content)
+#this function demonstrates the use of the Message class
+def greetingMessage(name:str):
+    stream_reply(buildGreeting(name))
 
-#this function demonstrates the use of the ChatPromptTemplate class
-def promptFromTemplate(question:str) -> any:
-    template = """
+# Compiled once and reused for every question
+TEMPLATE = """
     You are a kindergarten teacher. You are asked a question by your kindergarten and you need to answer it in the way they can understand.
 
     Question: {question}
@@ -43,10 +88,24 @@ def promptFromTemplate(question:str) -> any:
     - You need to answer the question in the way they can understand.
     - End the answer with an encouragement to learn more.
     """
-    prompt_template = ChatPromptTemplate.from_template(template)
+prompt_template = ChatPromptTemplate.from_template(TEMPLATE)
+
+#this function demonstrates the use of the ChatPromptTemplate class
+def promptFromTemplate(question:str) -> any:
     return prompt_template.invoke(question)
 
 def main():
+    global show_ttft
+    parser = argparse.ArgumentParser(description="AI Kindergarten Teacher")
+    parser.add_argument("--stub", action="store_true", help="Use a local fake chat model instead of Ollama.")
+    parser.add_argument("--ttft", action="store_true", help="Print time to first token after each reply.")
+    args = parser.parse_args()
+    show_ttft = args.ttft
+    if args.stub:
+        use_stub_model()
+    else:
+        threading.Thread(target=warm_up, daemon=True).start()
+
     print("Welcome to the Ai Kindergarten! Type 'exit' or 'quit' to leave.")
     print("What is your name?")
     name = input("You: ")
@@ -57,8 +116,8 @@ def main():
             print("Goodbye!")
             break
         prompt= promptFromTemplate(user_input)
-        reply = model.invoke(prompt)
-        print(f"Teacher: {reply.content}\n")
+        stream_reply(prompt, prefix="Teacher: ")
+        print()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+from langchain.schema import SystemMessage, HumanMessage, AIMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+from AiKindergartenTeacher import buildGreeting, get_model
+
+TEACHER_INSTRUCTIONS = (
+    "You are a kindergarten teacher. You are asked a question by your kindergarten student "
+    "and you need to answer it in the way they can understand. "
+    "End the answer with an encouragement to learn more."
+)
+# Messages kept per student (besides the system message) so prompts stay short
+MAX_HISTORY_MESSAGES = 10
+# Shortest retry delay suggested with a BUSY reply
+MIN_RETRY_SECONDS = 0.01
+# A turned-away student keeps their place in line this long past the suggested retry time
+WAITLIST_GRACE_SECONDS = 2.0
+
+
+class Busy(Exception):
+    """Raised instead of queueing when the classroom can't take another question right now."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class StudentSession:
+    """One student's conversation with the teacher."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.history = []
+        self.pending = False
+
+    def build_messages(self, question: str) -> list:
+        return [SystemMessage(content=TEACHER_INSTRUCTIONS), *self.history, HumanMessage(content=question)]
+
+    def remember(self, question: str, answer: str):
+        self.history += [HumanMessage(content=question), AIMessage(content=answer)]
+        # Drop the oldest question/answer pairs once the history grows too long
+        self.history = self.history[-MAX_HISTORY_MESSAGES:]
+
+
+class Classroom:
+    """Shares one chat model between many students.
+
+    At most max_concurrent requests run on the model at once. Waiting questions are
+    served first come, first served, and each student may only have one question
+    waiting, so no student can crowd out the others. When the waiting line is full,
+    ask() raises Busy right away instead of letting the student time out. A student
+    turned away keeps their place: freed places go to the waitlist in order, so
+    newcomers can't keep jumping ahead of them. A place is only held while the student
+    keeps retrying; it lapses WAITLIST_GRACE_SECONDS after the suggested retry time.
+    The waitlist holds at most max_waitlist students (4 x max_waiting by default).
+    """
+
+    def __init__(self, model, max_concurrent: int = 2, max_waiting: int = 16, max_waitlist: int = None):
+        self.model = model
+        self.max_concurrent = max_concurrent
+        self.queue = asyncio.Queue(maxsize=max_waiting)
+        self.max_waitlist = max_waitlist if max_waitlist is not None else 4 * max_waiting
+        self.workers = []
+        # Turned-away students in arrival order, each with the time their place lapses
+        self.waitlist = {}
+        self.running = {}
+        # Moving average of request time; None until the first request finishes
+        self.average_seconds = None
+
+    def start(self):
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrent)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            messages, future = await self.queue.get()
+            start = time.perf_counter()
+            self.running[id(future)] = start
+            try:
+                reply = await self.model.ainvoke(messages)
+                if not future.cancelled():
+                    future.set_result(reply.content)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                del self.running[id(future)]
+                elapsed = time.perf_counter() - start
+                if self.average_seconds is None:
+                    self.average_seconds = elapsed
+                else:
+                    self.average_seconds = 0.8 * self.average_seconds + 0.2 * elapsed
+                self.queue.task_done()
+
+    def retry_after(self, places: int = 1) -> float:
+        """Estimated time until `places` places in the waiting line open up."""
+        if self.average_seconds is not None:
+            per_place = self.average_seconds / self.max_concurrent
+        else:
+            # Nothing has finished yet, but the running requests have taken at least this long
+            oldest = min(self.running.values(), default=time.perf_counter())
+            per_place = (time.perf_counter() - oldest) / self.max_concurrent
+        return max(per_place * places, MIN_RETRY_SECONDS)
+
+    def leave(self, session: StudentSession):
+        """Gives up a student's place on the waitlist, e.g. when they disconnect."""
+        self.waitlist.pop(session, None)
+
+    def _drop_expired(self):
+        now = time.perf_counter()
+        for session, deadline in list(self.waitlist.items()):
+            if deadline < now:
+                del self.waitlist[session]
+
+    async def _submit(self, session: StudentSession, messages: list) -> str:
+        if session.pending:
+            raise Busy(f"{session.name} already has a question waiting.", self.retry_after())
+        self._drop_expired()
+        free = self.queue.maxsize - self.queue.qsize()
+        if session in self.waitlist:
+            position = list(self.waitlist).index(session) + 1
+        else:
+            position = len(self.waitlist) + 1
+        if position > free:
+            ahead = position - free
+            retry_after = self.retry_after(ahead)
+            if session not in self.waitlist and len(self.waitlist) >= self.max_waitlist:
+                raise Busy("The teacher is busy and the line is full.", retry_after)
+            # Joining, or retrying, (re)starts the clock on this student's place
+            self.waitlist[session] = time.perf_counter() + retry_after + WAITLIST_GRACE_SECONDS
+            raise Busy(f"The teacher is busy with other students. You are number {ahead} in line.", retry_after)
+        self.leave(session)
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((messages, future))
+        session.pending = True
+        try:
+            return await future
+        finally:
+            session.pending = False
+
+    async def greet(self, session: StudentSession) -> str:
+        return await self._submit(session, buildGreeting(session.name))
+
+    async def ask(self, session: StudentSession, question: str) -> str:
+        answer = await self._submit(session, session.build_messages(question))
+        session.remember(question, answer)
+        return answer
+
+
+async def handle_student(classroom: Classroom, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Line-based protocol: the first line is the student's name, every later line a question.
+    After a BUSY reply, an empty line re-sends the greeting or question that was turned away.
+    """
+
+    async def send(text: str):
+        writer.write((text.replace("\n", " ") + "\n").encode())
+        await writer.drain()
+
+    session = None
+    try:
+        await send("Welcome to the Ai Kindergarten! What is your name?")
+        name = (await reader.readline()).decode().strip()
+        if not name:
+            return
+        session = StudentSession(name)
+        question = None
+        while True:
+            turned_away = False
+            try:
+                if question is None:
+                    answer = await classroom.greet(session)
+                else:
+                    answer = await classroom.ask(session, question)
+                await send(f"Teacher: {answer}")
+            except Busy as e:
+                # Tell the student when to try again instead of making them wait
+                turned_away = True
+                await send(f"BUSY {e.retry_after:.2f} {e} Send an empty line to retry.")
+            except Exception as e:
+                await send(f"ERROR {e}")
+
+            # Wait for the next question; an empty line only counts as a retry after BUSY
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                text = line.decode().strip()
+                if text or turned_away:
+                    break
+            if not text:
+                continue
+            if text.lower() in ("exit", "quit"):
+                await send("Goodbye!")
+                break
+            question = text
+    finally:
+        if session is not None:
+            # Don't hold a place in line for a student who has gone
+            classroom.leave(session)
+        writer.close()
+
+
+async def serve(model, host: str, port: int, max_concurrent: int, max_waiting: int):
+    classroom = Classroom(model, max_concurrent, max_waiting)
+    classroom.start()
+    server = await asyncio.start_server(lambda r, w: handle_student(classroom, r, w), host, port)
+    print(f"Classroom open on {host}:{port} (max {max_concurrent} at once, {max_waiting} waiting).")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await classroom.stop()
+
+
+class SlowFakeChatModel(GenericFakeChatModel):
+    """Local stand-in for Ollama that takes a fixed time per reply."""
+
+    delay: float = 0.2
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def fake_model(delay: float) -> SlowFakeChatModel:
+    answer = AIMessage(content="Plants drink water and eat sunlight to grow big and strong. Keep being curious!")
+    return SlowFakeChatModel(messages=itertools.repeat(answer), delay=delay)
+
+
+async def simulate_classroom(students: int, questions: int, delay: float, max_concurrent: int, max_waiting: int):
+    """Have many fake students ask questions at once and report throughput and latency."""
+    classroom = Classroom(fake_model(delay), max_concurrent, max_waiting)
+    classroom.start()
+    latencies = []
+    busy_signals = 0
+
+    async def student(number: int):
+        nonlocal busy_signals
+        session = StudentSession(f"Student {number}")
+        for i in range(questions + 1):
+            start = time.perf_counter()
+            while True:
+                try:
+                    if i == 0:
+                        await classroom.greet(session)
+                    else:
+                        await classroom.ask(session, f"Question {i}: how do plants grow?")
+                    break
+                except Busy as e:
+                    busy_signals += 1
+                    await asyncio.sleep(e.retry_after)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(student(n) for n in range(1, students + 1)))
+    elapsed = time.perf_counter() - start
+    await classroom.stop()
+
+    latencies.sort()
+    print(f"{students} students, {len(latencies)} replies in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} replies/s")
+    print(f"Latency p50: {statistics.median(latencies) * 1000:.0f} ms, "
+          f"p95: {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.0f} ms, "
+          f"max: {latencies[-1] * 1000:.0f} ms")
+    print(f"Busy signals: {busy_signals}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the AI kindergarten teacher to many students at once")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-concurrent", type=int, default=2, help="Requests sent to the model at once.")
+    parser.add_argument("--max-waiting", type=int, default=16, help="Questions allowed to wait before students get BUSY.")
+    parser.add_argument("--stub", action="store_true", help="Serve a local fake chat model instead of Ollama.")
+    parser.add_argument("--simulate", type=int, metavar="STUDENTS", help="Run a simulated classroom load and exit.")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per simulated student.")
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds per reply for the fake chat model.")
+    args = parser.parse_args()
+
+    if args.simulate:
+        asyncio.run(simulate_classroom(args.simulate, args.questions, args.delay, args.max_concurrent, args.max_waiting))
+        return
+    model = fake_model(args.delay) if args.stub else get_model()
+    try:
+        asyncio.run(serve(model, args.host, args.port, args.max_concurrent, args.max_waiting))
+    except KeyboardInterrupt:
+        print("Classroom closed.")
+
+if __name__ == "__main__":
+    main()
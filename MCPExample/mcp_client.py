@@ -1,6 +1,9 @@
 # mcp_client.py
+import argparse
 import asyncio
 import os
+import re
+import time
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
@@ -48,13 +51,38 @@ async def list_mcp_prompts():
         print(f"An error occurred listing prompts in the client: {e}")
         traceback.print_exc()
 
-async def run_mcp_client(state: str):
+def parse_states(user_input: str) -> list[str]:
+    """Split input such as 'CA, NY TX' into unique state codes, keeping their order."""
+    return list(dict.fromkeys(s.upper() for s in re.split(r"[\s,]+", user_input) if s))
+
+async def fetch_alerts(session: ClientSession, state: str) -> str:
+    result = await session.call_tool("get_weather_alerts", {"state": state})
+    return f"Tool 'get_weather_alerts' returned: \n{result.content[0].text}"
+
+async def fetch_ewa_prompt(session: ClientSession, state: str) -> str:
+    prompt_result = await session.get_prompt("ewa", {"location": state})
+    return f"Prompt 'ewa' returned: \n{prompt_result.description}\n{prompt_result.messages[0].content.text}"
+
+async def timed_call(limiter: asyncio.Semaphore, label: str, call) -> tuple[str, float, str]:
+    """Run one request under the in-flight limit and report how long it took."""
+    async with limiter:
+        start = time.perf_counter()
+        try:
+            text = await call
+        except Exception as e:
+            text = f"An error occurred: {e}"
+        return label, time.perf_counter() - start, text
+
+async def run_mcp_client(states: list[str], max_in_flight: int = 4, alerts_refresh: float = 0):
     print("Starting MCP Echo Client...")
 
     # Configure the server parameters
+    server_args = ['mcp_server.py']
+    if alerts_refresh > 0:
+        server_args += ['--alerts-refresh', str(alerts_refresh)]
     server_params = StdioServerParameters(
         command=venv_python,
-        args=['mcp_server.py']
+        args=server_args
     )
 
     try:
@@ -67,15 +95,22 @@ async def run_mcp_client(state: str):
                 # Initialize the session
                 await session.initialize()
 
-                result = await session.call_tool("get_weather_alerts", {"state": state})
-                print("Tool 'get_weather_alerts' returned: ")
-                print(result.content[0].text)
+                # Dispatch every tool and prompt call at once over this session;
+                # the semaphore caps how many are outstanding on the server.
+                limiter = asyncio.Semaphore(max(1, max_in_flight))
+                calls = []
+                for state in states:
+                    calls.append(timed_call(limiter, f"{state} alerts", fetch_alerts(session, state)))
+                    calls.append(timed_call(limiter, f"{state} ewa", fetch_ewa_prompt(session, state)))
+
+                start = time.perf_counter()
+                # Print each result as soon as it arrives rather than in input order
+                for finished in asyncio.as_completed(calls):
+                    label, elapsed, text = await finished
+                    print(f"[{label}] ({elapsed * 1000:.0f} ms)")
+                    print(text)
+                print(f"Completed {len(calls)} calls in {(time.perf_counter() - start) * 1000:.0f} ms.")
 
-                prompt_result = await session.get_prompt("ewa", {"location": state})
-                print("Prompt 'ewa' returned: ")
-                print(prompt_result.description)
-                print(prompt_result.messages[0].content.text)
-            
     except Exception as e:
         print(f"An error occurred in the client: {e}")
         traceback.print_exc()
@@ -83,12 +118,27 @@ async def run_mcp_client(state: str):
     print("Client finished.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interactive MCP weather alert client")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=4,
+        help="Maximum number of tool/prompt calls outstanding at once.",
+    )
+    parser.add_argument(
+        "--alerts-refresh",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Start the server with --alerts-refresh SECONDS (one national feed pull per lookup).",
+    )
+    args = parser.parse_args()
     # Ensure mcp_server.py exists in the same directory
     if not os.path.exists('mcp_server.py'):
         print("Error: 'mcp_server.py' not found in the current directory.")
         print("Please create 'mcp_server.py' as described above.")
         exit(1)
-    print("Welcome to the Weather Alert Shell! Ask weather alerts by prividing state i.e. 'CA'. \nType 'exit' or 'quit' to leave.")
+    print("Welcome to the Weather Alert Shell! Ask weather alerts by prividing state i.e. 'CA', or several at once i.e. 'CA NY TX'. \nType 'exit' or 'quit' to leave.")
     setup_env()
     asyncio.run(list_mcp_prompts())
     while True:
@@ -96,4 +146,6 @@ if __name__ == "__main__":
         if user_input.lower() in ("exit", "quit"):
             print("Goodbye!")
             break
-        asyncio.run(run_mcp_client(user_input))
\ No newline at end of file
+        states = parse_states(user_input)
+        if states:
+            asyncio.run(run_mcp_client(states, args.max_in_flight, args.alerts_refresh))
\ No newline at end of file
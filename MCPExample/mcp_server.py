@@ -1,6 +1,8 @@
 # mcp_server.py
+import argparse
 import asyncio
 import os
+import time
 from mcp.server.fastmcp import FastMCP
 
 from typing import Any
@@ -14,6 +16,13 @@ mcp = FastMCP("echo_server")
 NWS_API_BASE = "https://api.weather.gov"
 USER_AGENT = "weather-app/1.0"
 
+# Latest snapshot of the national active-alerts feed, indexed by state and
+# zone code. Stays None unless the server is started with --alerts-refresh.
+alerts_snapshot: dict[str, Any] | None = None
+# Set once the first pull has finished, so early tool calls wait for it instead
+# of going upstream. None when prefetching is disabled.
+first_pull_done: asyncio.Event | None = None
+
 async def make_nws_request(url: str) -> dict[str, Any] | None:
     """Make a request to the NWS API with proper error handling."""
     headers = {
@@ -39,6 +48,39 @@ Description: {props.get('description', 'No description available')}
 Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
+def index_alerts(features: list[dict]) -> dict[str, list[str]]:
+    """Group formatted alerts by state (e.g. CA) and UGC zone code (e.g. CAZ017)."""
+    by_area: dict[str, list[str]] = {}
+    for feature in features:
+        ugc_codes = ((feature.get("properties") or {}).get("geocode") or {}).get("UGC") or []
+        areas = {code[:2] for code in ugc_codes} | set(ugc_codes)
+        alert = format_alert(feature)
+        for area in areas:
+            by_area.setdefault(area, []).append(alert)
+    return by_area
+
+async def refresh_alerts_snapshot(interval: float):
+    """Periodically pull the national feed and swap in a freshly indexed snapshot."""
+    global alerts_snapshot
+    url = f"{NWS_API_BASE}/alerts/active"
+    while True:
+        try:
+            data = await make_nws_request(url)
+            if data and "features" in data:
+                # Build the new index completely before publishing it, so tool
+                # calls never see a half-filled snapshot.
+                alerts_snapshot = {
+                    "fetched_at": time.monotonic(),
+                    "by_area": index_alerts(data["features"]),
+                }
+        except Exception:
+            # On a failed pull keep serving the previous snapshot; its age shows it is stale.
+            pass
+        finally:
+            # Never leave tool calls waiting on a first pull that went wrong
+            first_pull_done.set()
+        await asyncio.sleep(interval)
+
 @mcp.prompt()
 def ewa(location: str) -> str:
     """
@@ -63,6 +105,17 @@ async def get_weather_alerts(state: str) -> str:
     Args:
         state: Two-letter US state code (e.g. CA, NY)
     """
+    if first_pull_done is not None:
+        await first_pull_done.wait()
+    if alerts_snapshot is not None:
+        age = time.monotonic() - alerts_snapshot["fetched_at"]
+        footer = f"\n(Snapshot age: {age:.0f}s)"
+        alerts = alerts_snapshot["by_area"].get(state.upper())
+        if not alerts:
+            return "No active alerts for this state." + footer
+        return "\n---\n".join(alerts) + footer
+
+    # No snapshot (prefetch disabled or the first pull failed): ask the API directly.
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
     data = await make_nws_request(url)
 
@@ -77,15 +130,34 @@ async def get_weather_alerts(state: str) -> str:
 
 
 
-async def main():
+async def main(alerts_refresh: float = 0):
     print("Starting MCP Echo Server 1...")
-    # Run the server over standard I/O (stdio)
-    # This is suitable for local development and simple examples
-    await mcp.run_stdio_async()
+    global first_pull_done
+    refresher = None
+    if alerts_refresh > 0:
+        first_pull_done = asyncio.Event()
+        # Serve get_weather_alerts from an in-memory snapshot refreshed in the background
+        refresher = asyncio.create_task(refresh_alerts_snapshot(alerts_refresh))
+    try:
+        # Run the server over standard I/O (stdio)
+        # This is suitable for local development and simple examples
+        await mcp.run_stdio_async()
+    finally:
+        if refresher is not None:
+            refresher.cancel()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP weather alert server")
+    parser.add_argument(
+        "--alerts-refresh",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Prefetch the national alerts feed every SECONDS and answer from memory (0 disables).",
+    )
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.alerts_refresh))
     except asyncio.CancelledError:
         print("MCP Echo Server stopped.")
     except Exception as e:
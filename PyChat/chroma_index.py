@@ -0,0 +1,45 @@
+# --- ChromaDB Index Settings ---
+#
+# Chroma stores vectors in an HNSW graph. The settings below trade memory and
+# build time for recall and query speed:
+#   space           - distance metric: "l2", "cosine" or "ip" (inner product)
+#   M               - links per node; higher means better recall and more memory
+#   ef_construction - candidates considered while building; higher means a better graph, slower adds
+#   ef_search       - candidates considered per query; higher means better recall, slower queries
+# Use hnsw_sweep.py to measure recall against latency for your own data.
+
+DEFAULT_SPACE = "l2"
+DEFAULT_M = 16
+DEFAULT_EF_CONSTRUCTION = 100
+DEFAULT_EF_SEARCH = 100
+
+
+def get_or_create_collection(
+    client,
+    name: str,
+    space: str = DEFAULT_SPACE,
+    M: int = DEFAULT_M,
+    ef_construction: int = DEFAULT_EF_CONSTRUCTION,
+    ef_search: int = DEFAULT_EF_SEARCH,
+):
+    """
+    Returns the collection with this name, creating it with the given HNSW settings if it
+    does not exist. The metric and graph settings of an existing collection are kept as is.
+    """
+    return client.get_or_create_collection(
+        name=name,
+        metadata={
+            "hnsw:space": space,
+            "hnsw:M": M,
+            "hnsw:construction_ef": ef_construction,
+            "hnsw:search_ef": ef_search,
+        },
+    )
+
+
+def versioned_collection_name(base_name: str, model_name: str) -> str:
+    """
+    Each embedding model gets its own collection (e.g. knowledge_base-all-MiniLM-L6-v2), so
+    indexes built with different models and dimensions never overwrite each other.
+    """
+    return f"{base_name}-{model_name.replace('/', '-')}"
@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+
+import numpy as np
+
+# --- Shared Embedding Service ---
+#
+# Loads each SentenceTransformer model once and serves it to every PyChat script.
+# Concurrent encode requests for the same model are merged into micro-batches.
+#
+# Wire format (both directions): a 4-byte big-endian header length, a JSON header,
+# then an optional raw payload whose size is given by the header's "nbytes".
+#   request header:  {"model": "all-mpnet-base-v2", "texts": ["...", ...]}
+#   response header: {"shape": [n, dim], "dtype": "float32", "nbytes": ...} or {"error": "..."}
+# Embeddings travel as the raw float32 buffer, never as JSON lists.
+
+# Start it with `python3 embedding_service.py [--address unix:/tmp/embeddings.sock]`, then set
+# EMBEDDING_SERVICE to the same address ("127.0.0.1:8766" or "unix:/tmp/embeddings.sock")
+# before running the PyChat scripts.
+SERVICE_ENV = "EMBEDDING_SERVICE"
+# Set EMBEDDING_BACKEND=onnx to encode with the quantized ONNX export instead of PyTorch
+BACKEND_ENV = "EMBEDDING_BACKEND"
+DEFAULT_ADDRESS = "127.0.0.1:8766"
+HEADER = struct.Struct("!I")
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b""):
+    data = json.dumps(header).encode()
+    sock.sendall(HEADER.pack(len(data)) + data + payload)
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Embedding service closed the connection.")
+        received += count
+    return bytes(buffer)
+
+
+def connect(address: str) -> socket.socket:
+    if address.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address[len("unix:"):])
+    else:
+        host, port = address.rsplit(":", 1)
+        sock = socket.create_connection((host, int(port)))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+class RemoteEmbeddingModel:
+    """
+    Drop-in stand-in for SentenceTransformer that encodes through the embedding service.
+    Safe to share between threads: requests on the one connection take turns.
+    """
+
+    def __init__(self, model_name: str, address: str = DEFAULT_ADDRESS):
+        self.model_name = model_name
+        self.address = address
+        self.sock = None
+        # Replies carry no request id, so a request and its reply must not interleave with another thread's
+        self.lock = threading.Lock()
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = None,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """
+        Same shape rules as SentenceTransformer.encode: a string gives a 1-D vector, a list a 2-D array.
+        Only NumPy output is supported; options the service can't honour raise TypeError.
+        batch_size and show_progress_bar are accepted for compatibility, since the service batches itself.
+        """
+        unsupported = {name for name, value in kwargs.items() if value not in (None, False)}
+        if not convert_to_numpy:
+            unsupported.add("convert_to_numpy=False")
+        if unsupported:
+            raise TypeError(f"RemoteEmbeddingModel.encode does not support: {', '.join(sorted(unsupported))}")
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        with self.lock:
+            if self.sock is None:
+                self.sock = connect(self.address)
+            try:
+                send_message(self.sock, {"model": self.model_name, "texts": texts})
+                (size,) = HEADER.unpack(recv_exactly(self.sock, HEADER.size))
+                header = json.loads(recv_exactly(self.sock, size))
+                payload = recv_exactly(self.sock, header.get("nbytes", 0))
+            except Exception:
+                self.sock.close()
+                self.sock = None
+                raise
+        if "error" in header:
+            raise RuntimeError(f"Embedding service error: {header['error']}")
+        # Copy so callers get a writable array like SentenceTransformer returns
+        embeddings = np.frombuffer(payload, dtype=header["dtype"]).reshape(header["shape"]).copy()
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def load_local_model(model_name: str):
+    """
+    Loads the model in this process: the int8 ONNX Runtime export when
+    EMBEDDING_BACKEND=onnx (see onnx_embedding.py), otherwise SentenceTransformer.
+    """
+    if os.getenv(BACKEND_ENV) == "onnx":
+        from onnx_embedding import OnnxEmbeddingModel
+        return OnnxEmbeddingModel(model_name)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def load_embedding_model(model_name: str):
+    """
+    Returns a client for the shared embedding service if EMBEDDING_SERVICE is set,
+    otherwise loads the model in this process.
+    """
+    address = os.getenv(SERVICE_ENV)
+    if address:
+        return RemoteEmbeddingModel(model_name, address)
+    return load_local_model(model_name)
+
+
+class MicroBatcher:
+    """
+    Collects encode requests for one model and runs them together.
+    A batch is sent to the model once it holds max_batch texts or max_wait
+    seconds have passed since its first request, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch: int = 64, max_wait: float = 0.005):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def encode(self, texts: list) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            count = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while count < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                count += len(item[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                # Encode off the event loop so new requests keep queueing meanwhile
+                embeddings = await loop.run_in_executor(
+                    None, lambda: self.model.encode(texts, batch_size=self.max_batch, convert_to_numpy=True)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            start = 0
+            for request_texts, future in batch:
+                end = start + len(request_texts)
+                if not future.done():
+                    future.set_result(embeddings[start:end])
+                start = end
+
+
+class EmbeddingService:
+    def __init__(self, max_batch: int, max_wait: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.loading = {}
+
+    async def get_batcher(self, model_name: str) -> MicroBatcher:
+        """Loads each model only once, even if several clients ask for it at the same time."""
+        if model_name not in self.loading:
+            self.loading[model_name] = asyncio.create_task(self._load(model_name))
+        try:
+            return await self.loading[model_name]
+        except Exception:
+            # Let a later request retry a model that failed to load
+            self.loading.pop(model_name, None)
+            raise
+
+    async def _load(self, model_name: str) -> MicroBatcher:
+        print(f"Loading embedding model: {model_name}")
+        model = await asyncio.get_running_loop().run_in_executor(None, load_local_model, model_name)
+        return MicroBatcher(model, self.max_batch, self.max_wait)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    request = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    texts = request.get("texts")
+                    # A bare string would otherwise be encoded one character at a time
+                    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                        raise ValueError("'texts' must be a list of strings.")
+                    batcher = await self.get_batcher(request["model"])
+                    embeddings = await batcher.encode(texts)
+                    header = {"shape": list(embeddings.shape), "dtype": "float32", "nbytes": embeddings.nbytes}
+                    payload = embeddings.tobytes()
+                except Exception as e:
+                    header, payload = {"error": str(e)}, b""
+                data = json.dumps(header).encode()
+                writer.write(HEADER.pack(len(data)) + data + payload)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, address: str, preload: list):
+        for model_name in preload:
+            await self.get_batcher(model_name)
+        if address.startswith("unix:"):
+            path = address[len("unix:"):]
+            if os.path.exists(path):
+                os.remove(path)
+            server = await asyncio.start_unix_server(self.handle_client, path)
+        else:
+            host, port = address.rsplit(":", 1)
+            server = await asyncio.start_server(self.handle_client, host, int(port))
+        print(f"Embedding service listening on {address}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared SentenceTransformer embedding service with micro-batching")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port or unix:/path/to.sock")
+    parser.add_argument("--preload", nargs="*", default=["all-MiniLM-L6-v2", "all-mpnet-base-v2"],
+                        help="Models to load at startup; others are loaded on first request.")
+    parser.add_argument("--max-batch", type=int, default=64, help="Maximum texts per micro-batch.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="How long a batch waits for more requests before encoding.")
+    args = parser.parse_args()
+    service = EmbeddingService(args.max_batch, args.max_wait_ms / 1000)
+    try:
+        asyncio.run(service.serve(args.address, args.preload))
+    except KeyboardInterrupt:
+        print("Embedding service stopped.")
+
+
+if __name__ == "__main__":
+    main()
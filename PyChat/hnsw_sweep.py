@@ -0,0 +1,92 @@
+import argparse
+import itertools
+import time
+
+import chromadb
+import numpy as np
+
+from chroma_index import get_or_create_collection
+
+# --- HNSW Parameter Sweep ---
+#
+# Builds a ChromaDB collection for every combination of M, ef_construction and
+# ef_search, runs the same queries against each and reports recall@k against exact
+# brute-force search together with build time and query latency.
+#
+#   python3 hnsw_sweep.py --count 20000 --dim 384 --M 8 16 32 --ef-search 10 50 100
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Brute-force nearest neighbours, used as ground truth for recall."""
+    if space == "cosine":
+        corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        distances = -queries @ corpus.T
+    elif space == "ip":
+        distances = -queries @ corpus.T
+    else:
+        distances = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ corpus.T + (corpus ** 2).sum(axis=1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def make_corpus(count: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Clustered random vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    return (centers[labels] + 0.5 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+def run_sweep(args):
+    corpus = make_corpus(args.count + args.queries, args.dim, args.clusters, args.seed)
+    corpus, queries = corpus[:args.count], corpus[args.count:]
+    truth = exact_top_k(corpus, queries, args.top_k, args.space)
+    ids = [str(i) for i in range(args.count)]
+
+    client = chromadb.EphemeralClient()
+    batch_size = client.get_max_batch_size()
+    print(f"{args.count} vectors, {args.dim} dims, {args.queries} queries, recall@{args.top_k}, space={args.space}")
+    print(f"{'M':>4} {'ef_con':>7} {'ef_search':>9} {'build s':>8} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7}")
+
+    # Every parameter set gets a freshly built collection: a local Chroma index keeps the
+    # ef_search it was loaded with, even after collection.modify().
+    for M, ef_construction, ef_search in itertools.product(args.M, args.ef_construction, args.ef_search):
+        name = f"sweep-{M}-{ef_construction}-{ef_search}"
+        collection = get_or_create_collection(client, name, args.space, M, ef_construction, ef_search)
+        start = time.perf_counter()
+        for i in range(0, args.count, batch_size):
+            collection.add(ids=ids[i:i + batch_size], embeddings=corpus[i:i + batch_size])
+        build_seconds = time.perf_counter() - start
+
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[query], n_results=args.top_k, include=[])
+            latencies.append(time.perf_counter() - start)
+            found = {int(i) for i in result["ids"][0]}
+            hits += len(found & set(expected.tolist()))
+        recall = hits / (len(queries) * args.top_k)
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(f"{M:>4} {ef_construction:>7} {ef_search:>9} {build_seconds:>8.2f} {recall:>7.3f} {p50:>7.2f} {p95:>7.2f}")
+
+        client.delete_collection(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report ChromaDB HNSW recall versus latency for each parameter set")
+    parser.add_argument("--count", type=int, default=10000, help="Vectors in the collection.")
+    parser.add_argument("--dim", type=int, default=384, help="384 for all-MiniLM-L6-v2, 768 for all-mpnet-base-v2.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"], default="cosine")
+    parser.add_argument("--M", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--seed", type=int, default=0)
+    run_sweep(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import os
 import chromadb
-from sentence_transformers import SentenceTransformer # Or from openai import OpenAI
+from embedding_service import load_embedding_model # Uses the shared embedding service when EMBEDDING_SERVICE is set
 from langchain.text_splitter import RecursiveCharacterTextSplitter # Good for chunking
 import openai
 
@@ -17,7 +17,7 @@ except:
     collection = client.create_collection(name=collection_name)
 
 # Initialize sentence transformer for embeddings
-embedding_model = SentenceTransformer('all-mpnet-base-v2')
+embedding_model = load_embedding_model('all-mpnet-base-v2')
 
 # Knowledge base data
 knowledge_base = [
@@ -1,6 +1,6 @@
 import os
 from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
+from embedding_service import load_embedding_model # Uses the shared embedding service when EMBEDDING_SERVICE is set
 import numpy as np
 import openai
 
@@ -31,7 +31,7 @@ print(f"Created new index: {index_name}")
 index = pinecone.Index(index_name)
 
 # Initialize embedding model
-model = SentenceTransformer('all-mpnet-base-v2')
+model = load_embedding_model('all-mpnet-base-v2')
 
 # Sample documents
 documents = [
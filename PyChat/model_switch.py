@@ -0,0 +1,239 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from chroma_index import get_or_create_collection, versioned_collection_name
+from embedding_service import load_embedding_model
+
+# --- Zero-Downtime Embedding Model Switch ---
+#
+# Queries keep hitting the live model's collection while a background job re-embeds
+# every document with the new model into that model's own collection, at a throttled
+# rate. When the new collection is complete, the live index is swapped in one step.
+# In shadow mode each query also runs against the new index (off the query path) to
+# compare latency and top-k overlap; the swap then waits for a 'swap' command so the
+# finished index can be judged before it goes live.
+#
+#   python3 model_switch.py --to all-mpnet-base-v2 --rate 20 --shadow
+
+
+class LiveIndex:
+    """The (model, collection) pair that currently answers queries."""
+
+    def __init__(self, client, base_name: str, model_name: str, embedding_model=None):
+        self.client = client
+        self.base_name = base_name
+        # Reentrant so a caller holding it (ReindexJob.swap) can still call swap()
+        self.lock = threading.RLock()
+        self.current = (
+            model_name,
+            embedding_model or load_embedding_model(model_name),
+            get_or_create_collection(client, versioned_collection_name(base_name, model_name), space="cosine"),
+        )
+        self.shadow = None
+        self.reset_shadow_stats()
+        self.shadow_pool = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def model_name(self) -> str:
+        return self.current[0]
+
+    def swap(self, model_name: str, embedding_model, collection):
+        """Makes the new index live. Queries already running finish on the old one."""
+        with self.lock:
+            self.current = (model_name, embedding_model, collection)
+            self.shadow = None
+
+    def search(self, query: str, top_k: int = 3, where: dict = None, where_document: dict = None) -> list:
+        with self.lock:
+            model_name, embedding_model, collection = self.current
+            shadow = self.shadow
+
+        start = time.perf_counter()
+        documents = query_collection(embedding_model, collection, query, top_k, where, where_document)
+        live_ms = (time.perf_counter() - start) * 1000
+
+        if shadow is not None:
+            # Compare against the new index in the background so the caller never waits for it
+            self.shadow_pool.submit(self._shadow_query, shadow, query, top_k, where, where_document, documents, live_ms)
+        return documents
+
+    def _shadow_query(self, shadow, query, top_k, where, where_document, live_documents, live_ms):
+        embedding_model, collection = shadow
+        start = time.perf_counter()
+        documents = query_collection(embedding_model, collection, query, top_k, where, where_document)
+        shadow_ms = (time.perf_counter() - start) * 1000
+        overlap = len(set(documents) & set(live_documents)) / max(len(live_documents), 1)
+        stats = self.shadow_stats
+        stats["queries"] += 1
+        stats["live_ms"] += live_ms
+        stats["shadow_ms"] += shadow_ms
+        stats["overlap"] += overlap
+
+    def reset_shadow_stats(self):
+        self.shadow_stats = {"queries": 0, "live_ms": 0.0, "shadow_ms": 0.0, "overlap": 0.0}
+
+    def shadow_report(self) -> str:
+        stats = self.shadow_stats
+        if stats["queries"] == 0:
+            return "No shadow queries yet."
+        n = stats["queries"]
+        return (f"Shadow queries: {n}, live {stats['live_ms'] / n:.1f} ms, shadow {stats['shadow_ms'] / n:.1f} ms, "
+                f"top-k overlap {stats['overlap'] / n:.0%}")
+
+
+def query_collection(embedding_model, collection, query: str, top_k: int, where: dict, where_document: dict) -> list:
+    query_embedding = embedding_model.encode([query])
+    results = collection.query(
+        query_embeddings=query_embedding.tolist(),
+        n_results=top_k,
+        where=where,
+        where_document=where_document
+    )
+    if results['documents'] and results['documents'][0]:
+        return results['documents'][0]
+    return []
+
+
+class ReindexJob(threading.Thread):
+    """
+    Re-embeds every document of the live collection with a new model into the new
+    model's collection, at most `rate` documents per second. Documents already present
+    in the new collection are skipped, so an interrupted job can simply be started again.
+
+    The job only counts as complete once every id in the live collection is in the new
+    one; documents added during the build are picked up by another pass, and swap() runs
+    a last one under the live lock. It then swaps the new index in, or with auto_swap=False
+    waits for swap() so shadow queries can be compared against the finished index first.
+    """
+
+    def __init__(self, live: LiveIndex, model_name: str, rate: float = 50, batch_size: int = 16,
+                 shadow: bool = False, auto_swap: bool = True):
+        super().__init__(daemon=True)
+        self.live = live
+        self.model_name = model_name
+        self.rate = rate
+        self.batch_size = batch_size
+        self.shadow = shadow
+        self.auto_swap = auto_swap
+        self.embedding_model = None
+        self.collection = None
+        self.complete = False
+        self.done = 0
+        self.total = 0
+        self.status = "pending"
+
+    def run(self):
+        try:
+            self.status = "loading model"
+            self.embedding_model = load_embedding_model(self.model_name)
+            self.collection = get_or_create_collection(
+                self.live.client, versioned_collection_name(self.live.base_name, self.model_name), space="cosine"
+            )
+            with self.live.lock:
+                _, _, source = self.live.current
+                if self.shadow:
+                    self.live.shadow = (self.embedding_model, self.collection)
+
+            self.status = "re-indexing"
+            while self.index_missing(source, throttle=True):
+                pass
+
+            self.complete = True
+            if self.auto_swap:
+                self.swap()
+            else:
+                # Compare against the finished index only from here on
+                self.live.reset_shadow_stats()
+                self.status = "complete, type 'swap' to go live"
+        except Exception as e:
+            self.status = f"failed: {e}"
+
+    def index_missing(self, source, throttle: bool = False) -> int:
+        """
+        One pass: embeds every document of `source` that the new collection lacks and
+        returns how many there were. With throttle, stays under `rate` documents per second.
+        """
+        source_ids = source.get(include=[])["ids"]
+        present = set(self.collection.get(ids=source_ids, include=[])["ids"]) if source_ids else set()
+        missing = [doc_id for doc_id in source_ids if doc_id not in present]
+        self.total = len(source_ids)
+        self.done = len(present)
+        start = time.perf_counter()
+        for offset in range(0, len(missing), self.batch_size):
+            batch = source.get(ids=missing[offset:offset + self.batch_size], include=["documents", "metadatas"])
+            embeddings = self.embedding_model.encode(batch["documents"])
+            self.collection.add(
+                ids=batch["ids"],
+                embeddings=embeddings.tolist(),
+                documents=batch["documents"],
+                # Per document; Chroma accepts None for documents without metadata
+                metadatas=batch["metadatas"],
+            )
+            self.done += len(batch["ids"])
+            if throttle:
+                # Sleep until we are back under `rate` documents per second
+                ahead = (offset + len(batch["ids"])) / self.rate - (time.perf_counter() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+        return len(missing)
+
+    def swap(self) -> bool:
+        """
+        Makes the new index live once the build is complete. Documents added to the live
+        collection since the last pass are indexed first, under the live lock, so nothing
+        written before the swap is missing from the new index.
+        """
+        if not self.complete:
+            return False
+        with self.live.lock:
+            _, _, source = self.live.current
+            self.index_missing(source)
+            self.live.swap(self.model_name, self.embedding_model, self.collection)
+        self.status = f"complete, now serving {self.model_name}"
+        return True
+
+    def progress(self) -> str:
+        return f"Re-index to {self.model_name}: {self.status} ({self.done}/{self.total} documents)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Switch the knowledge base to a new embedding model without downtime")
+    parser.add_argument("--to", default="all-mpnet-base-v2", help="Embedding model to switch to.")
+    parser.add_argument("--rate", type=float, default=20, help="Documents re-embedded per second.")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--shadow", action="store_true",
+                        help="Also query the new index and compare results; the swap then waits for 'swap'.")
+    args = parser.parse_args()
+
+    # The all-MiniLM-L6-v2 knowledge base built by vector_Chroma.py is the live index
+    import vector_Chroma
+    live = LiveIndex(vector_Chroma.client, "knowledge_base", vector_Chroma.embedding_model_name, vector_Chroma.embedding_model)
+    # In shadow mode keep the old index live until the finished new one has been compared and approved
+    job = ReindexJob(live, args.to, rate=args.rate, batch_size=args.batch_size,
+                     shadow=args.shadow, auto_swap=not args.shadow)
+    job.start()
+
+    swap_hint = "'swap' to go live once complete, " if args.shadow else ""
+    print(f"Serving {live.model_name} while re-indexing with {args.to}. "
+          f"Type 'status' for progress, {swap_hint}'exit' or 'quit' to leave.")
+    while True:
+        user_input = input("\nYou: ")
+        if user_input.lower() in ("exit", "quit"):
+            print("Goodbye!")
+            break
+        if user_input.lower() == "status":
+            print(job.progress())
+            if args.shadow:
+                print(live.shadow_report())
+            continue
+        if user_input.lower() == "swap":
+            print(f"Now serving {live.model_name}." if job.swap() else job.progress())
+            continue
+        relevant_docs = live.search(user_input)
+        print(f"[{live.model_name}] {vector_Chroma.format_search_results(relevant_docs)}")
+
+
+if __name__ == "__main__":
+    main()
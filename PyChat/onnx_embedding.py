@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+# --- Optimized CPU Embedding Backend ---
+#
+# Exports a SentenceTransformer model to ONNX, quantizes its weights to int8 and
+# runs it with ONNX Runtime. Used by load_embedding_model() when
+# EMBEDDING_BACKEND=onnx is set.
+#
+#   python3 onnx_embedding.py export all-mpnet-base-v2   # writes onnx_models/all-mpnet-base-v2/
+#   python3 onnx_embedding.py check all-mpnet-base-v2    # cosine accuracy vs. the reference model
+#   python3 onnx_embedding.py bench all-mpnet-base-v2    # throughput vs. SentenceTransformer
+
+ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "onnx_models")
+ONNX_THREADS_ENV = "EMBEDDING_THREADS"
+
+# Sample sentences for the accuracy check and the benchmark
+SAMPLE_SENTENCES = [
+    "Fact: The capital of France is Paris. Paris is also known for the Eiffel Tower and the Louvre Museum.",
+    "Fact: The capital of Italy is Rome.",
+    "Fact: The Great Barrier Reef, located off the coast of Queensland, Australia, is the world's largest coral reef system.",
+    "I love gelato.",
+    "ice cream is my favorite dessert.",
+    "I love to eat ice cream.",
+    "I love desserts in Paris.",
+    "I love gelato near Trevi Fountain.",
+    "where should I get best ice cream",
+    "tell me about Paris",
+    "what about gelato",
+    "Fact: Photosynthesis is the process used by plants, algae, and cyanobacteria to convert light energy into chemical energy, stored in glucose.",
+]
+
+
+def model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_DIR, model_name)
+
+
+def default_threads() -> int:
+    return int(os.getenv(ONNX_THREADS_ENV, os.cpu_count() or 1))
+
+
+def export_model(model_name: str) -> str:
+    """
+    Exports the transformer of a SentenceTransformer model to ONNX, then writes a
+    dynamically int8-quantized copy next to it. Pooling and normalization are done
+    in NumPy by OnnxEmbeddingModel, using the settings saved in config.json.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = model_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+    reference = SentenceTransformer(model_name, device="cpu")
+    transformer = reference[0]
+    tokenizer = transformer.tokenizer
+    # Same order as the arguments of LastHiddenState.forward; not every model uses token_type_ids
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in tokenizer.model_input_names]
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if token_type_ids is not None:
+                inputs["token_type_ids"] = token_type_ids
+            return self.auto_model(**inputs).last_hidden_state
+
+    sample = tokenizer(["An example sentence to trace the model."], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    float_path = os.path.join(out_dir, "model.onnx")
+    # The TorchScript exporter: recent torch defaults to the dynamo exporter, which ignores
+    # dynamic_axes and cannot write opset 14
+    torch.onnx.export(
+        LastHiddenState(transformer.auto_model).eval(),
+        tuple(sample[name] for name in input_names),
+        float_path,
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+        dynamo=False,
+    )
+
+    # Dynamic quantization: int8 weights, activations quantized on the fly per batch
+    quantize_dynamic(float_path, os.path.join(out_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(out_dir)
+    config = {
+        "model_name": model_name,
+        "input_names": input_names,
+        "max_seq_length": reference.max_seq_length,
+        "normalize": any(type(module).__name__ == "Normalize" for module in reference),
+    }
+    with open(os.path.join(out_dir, "config.json"), "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"Exported {model_name} to {out_dir}")
+    return out_dir
+
+
+class OnnxEmbeddingModel:
+    """Runs an exported model with ONNX Runtime; encode() follows SentenceTransformer.encode."""
+
+    def __init__(self, model_name: str, quantized: bool = True, threads: int = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = model_dir(model_name)
+        if not os.path.exists(os.path.join(path, "config.json")):
+            raise FileNotFoundError(
+                f"No ONNX export for {model_name} in {path}. Run: python3 onnx_embedding.py export {model_name}"
+            )
+        with open(os.path.join(path, "config.json")) as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+
+        options = ort.SessionOptions()
+        # Set thread counts explicitly: one pool sized to the cores, no nested parallelism
+        options.intra_op_num_threads = threads or default_threads()
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        onnx_file = "model.int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            os.path.join(path, onnx_file), options, providers=["CPUExecutionProvider"]
+        )
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = None,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """
+        Same shape rules as SentenceTransformer.encode: a string gives a 1-D vector, a list a 2-D array.
+        Only NumPy output is supported; other options raise TypeError. show_progress_bar is ignored.
+        """
+        unsupported = {name for name, value in kwargs.items() if value not in (None, False)}
+        if not convert_to_numpy:
+            unsupported.add("convert_to_numpy=False")
+        if unsupported:
+            raise TypeError(f"OnnxEmbeddingModel.encode does not support: {', '.join(sorted(unsupported))}")
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        # Encode longest texts first so each batch holds similar lengths and needs little padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        embeddings = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_seq_length"],
+                return_tensors="np",
+            )
+            inputs = {name: tokens[name].astype(np.int64) for name in self.config["input_names"]}
+            hidden = self.session.run(None, inputs)[0]
+
+            # Mean pooling over real (non-padding) tokens, as SentenceTransformer does
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.config["normalize"] or normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, vector in zip(batch, pooled):
+                embeddings[i] = vector
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        result = np.stack(embeddings).astype(np.float32)
+        return result[0] if single else result
+
+
+def cosine_similarities(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def check_accuracy(model_name: str, tolerance: float, threads: int) -> bool:
+    """Every ONNX embedding must have cosine similarity >= 1 - tolerance with the reference embedding."""
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu").encode(SAMPLE_SENTENCES)
+    ok = True
+    for quantized in (False, True):
+        candidate = OnnxEmbeddingModel(model_name, quantized=quantized, threads=threads).encode(SAMPLE_SENTENCES)
+        similarities = cosine_similarities(reference, candidate)
+        passed = similarities.min() >= 1 - tolerance
+        ok = ok and passed
+        label = "int8" if quantized else "fp32"
+        print(f"{label}: min cosine {similarities.min():.5f}, mean {similarities.mean():.5f} "
+              f"(tolerance {tolerance}) -> {'OK' if passed else 'FAILED'}")
+    return ok
+
+
+def benchmark(model_name: str, repeat: int, batch_size: int, threads: int):
+    """Compares sentences/second of SentenceTransformer and the ONNX backend on the same thread count."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    sentences = SAMPLE_SENTENCES * repeat
+    backends = [
+        ("SentenceTransformer", SentenceTransformer(model_name, device="cpu")),
+        ("ONNX fp32", OnnxEmbeddingModel(model_name, quantized=False, threads=threads)),
+        ("ONNX int8", OnnxEmbeddingModel(model_name, quantized=True, threads=threads)),
+    ]
+    print(f"{len(sentences)} sentences, batch size {batch_size}, {threads} threads")
+    for label, backend in backends:
+        backend.encode(sentences[:batch_size], batch_size=batch_size)  # warm up
+        start = time.perf_counter()
+        backend.encode(sentences, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        # Single-query latency, which is what every RAG question pays
+        start = time.perf_counter()
+        for sentence in SAMPLE_SENTENCES:
+            backend.encode([sentence])
+        query_ms = (time.perf_counter() - start) / len(SAMPLE_SENTENCES) * 1000
+        print(f"{label:>20}: {len(sentences) / elapsed:8.1f} sentences/s, {query_ms:6.1f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, check and benchmark ONNX embedding models")
+    parser.add_argument("command", choices=["export", "check", "bench"])
+    parser.add_argument("model", nargs="?", default="all-mpnet-base-v2")
+    parser.add_argument("--threads", type=int, default=default_threads())
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Allowed 1 - cosine similarity for 'check'.")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the sample sentences for 'bench'.")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_model(args.model)
+    elif args.command == "check":
+        if not check_accuracy(args.model, args.tolerance, args.threads):
+            exit(1)
+    else:
+        benchmark(args.model, args.repeat, args.batch_size, args.threads)
+
+
+if __name__ == "__main__":
+    main()
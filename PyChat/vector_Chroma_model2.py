@@ -1,19 +1,19 @@
 import os
 import chromadb
-from sentence_transformers import SentenceTransformer # Or from openai import OpenAI
+from chroma_index import get_or_create_collection, versioned_collection_name
+from embedding_service import load_embedding_model # Uses the shared embedding service when EMBEDDING_SERVICE is set
 
 # Initialize ChromaDB client
 client = chromadb.Client()
 
-# Create or get collection
-collection_name = "knowledge_base"
-try:
-    collection = client.get_collection(name=collection_name)
-except:
-    collection = client.create_collection(name=collection_name)
-
 # Initialize sentence transformer for embeddings using all-mpnet-base-v2 model
-embedding_model = SentenceTransformer('all-mpnet-base-v2')
+embedding_model_name = 'all-mpnet-base-v2'
+embedding_model = load_embedding_model(embedding_model_name)
+
+# Create or get the collection for this embedding model
+# Sentence embeddings are compared by cosine similarity; see chroma_index.py for the HNSW settings
+collection_name = versioned_collection_name("knowledge_base", embedding_model_name)
+collection = get_or_create_collection(client, collection_name, space="cosine")
 
 # Knowledge base data
 knowledge_base = [
@@ -37,13 +37,17 @@ if collection.count() == 0:
     collection.add(
         embeddings=embeddings.tolist(),
         documents=knowledge_base,
+        # Tag each entry so searches can be limited to facts or to personal preferences
+        metadatas=[{"category": "fact" if doc.startswith("Fact:") else "preference"} for doc in knowledge_base],
         ids=[f"doc_{i}" for i in range(len(knowledge_base))]
     )
 
-def search_knowledge_base(query: str, top_k: int = 3) -> list:
+def search_knowledge_base(query: str, top_k: int = 3, where: dict = None, where_document: dict = None) -> list:
     """
     Searches the knowledge base using ChromaDB semantic search.
     Returns the most relevant documents.
+    Optional filters are applied by ChromaDB during the search, e.g.
+    where={"category": "fact"} or where_document={"$contains": "gelato"}.
     """
     # Generate embedding for the query
     query_embedding = embedding_model.encode([query])
@@ -52,7 +56,9 @@ def search_knowledge_base(query: str, top_k: int = 3) -> list:
     # Search for similar documents
     results = collection.query(
         query_embeddings=query_embedding.tolist(),
-        n_results=top_k
+        n_results=top_k,
+        where=where,
+        where_document=where_document
     )
     
     # Return relevant documents